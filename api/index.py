@@ -1,34 +1,47 @@
 import logging
 import os
 import typing
-from flask import Flask, request, jsonify
+import orjson
+from flask import Flask, Response, request, jsonify
 from collections import deque
-from dataclasses import dataclass
 from enum import Enum
 from typing import Dict, List, Set, Tuple, Optional
 
 # Initialize Flask app
 app = Flask(__name__)
+# Must be set before routes are registered; avoids trailing-slash redirects
+app.url_map.strict_slashes = False
+
+# Debug logging stays off the request path unless explicitly enabled
+DEBUG = os.environ.get("BATTLESNAKE_DEBUG", "") not in ("", "0")
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG if DEBUG else logging.WARNING)
+if DEBUG:
+    logging.basicConfig()
+
+def _json(obj) -> Response:
+    """Serialize a response body with orjson instead of Flask's stdlib encoder."""
+    return Response(orjson.dumps(obj), mimetype="application/json")
 
 # Flask routes
 @app.get("/")
 def on_info():
-    return info()
+    return _json(info())
 
 @app.post("/start")
 def on_start():
-    game_state = request.get_json()
+    game_state = orjson.loads(request.get_data())
     start(game_state)
     return "ok"
 
 @app.post("/move")
 def on_move():
-    game_state = request.get_json()
-    return move(game_state)
+    game_state = orjson.loads(request.get_data())
+    return _json(move(game_state))
 
 @app.post("/end")
 def on_end():
-    game_state = request.get_json()
+    game_state = orjson.loads(request.get_data())
     end(game_state)
     return "ok"
 
@@ -50,175 +63,208 @@ class Direction(Enum):
     LEFT = "left"
     RIGHT = "right"
 
-@dataclass
-class Position:
-    x: int
-    y: int
-
-    def __hash__(self):
-        return hash((self.x, self.y))
-
-    def to_dict(self) -> Dict:
-        return {"x": self.x, "y": self.y}
+# Fixed order of the per-direction move scores
+_DIRS = (Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT)
+
+# (dx, dy) offset of the cell each direction moves into
+_NEXT = {
+    Direction.UP: (0, 1),
+    Direction.DOWN: (0, -1),
+    Direction.LEFT: (-1, 0),
+    Direction.RIGHT: (1, 0)
+}
+_NEIGHBORS = tuple(_NEXT.values())
+
+def _flood_fill(grid: bytearray, w: int, h: int, start: int, limit: int) -> int:
+    """Count free cells reachable from a flat grid index, stopping at limit.
+
+    The grid is indexed by x * h + y and is used as the visited marker, so
+    callers must pass a copy they don't need afterwards.
+    """
+    if grid[start]:
+        return 0
+    grid[start] = 1
+    stack = [start]
+    push = stack.append
+    pop = stack.pop
+    size = w * h
+    count = 0
+    while stack:
+        i = pop()
+        count += 1
+        if count >= limit:
+            break
+
+        y = i % h
+        if y + 1 < h and not grid[i + 1]:
+            grid[i + 1] = 1
+            push(i + 1)
+        if y > 0 and not grid[i - 1]:
+            grid[i - 1] = 1
+            push(i - 1)
+        if i + h < size and not grid[i + h]:
+            grid[i + h] = 1
+            push(i + h)
+        if i >= h and not grid[i - h]:
+            grid[i - h] = 1
+            push(i - h)
+
+    return count
+
+def _build_wall_penalty(w: int, h: int) -> Dict[Tuple[int, int], int]:
+    """Map each border cell to its wall penalty; corners count against both walls."""
+    wall_penalty: Dict[Tuple[int, int], int] = {}
+    for x in {0, w - 1}:
+        for y in range(h):
+            wall_penalty[(x, y)] = 10
+    for y in {0, h - 1}:
+        for x in range(w):
+            wall_penalty[(x, y)] = wall_penalty.get((x, y), 0) + 10
+    return wall_penalty
+
+def _build_game_cache(game_state: Dict) -> Dict:
+    """Build the read-only data that stays the same for every turn of a game."""
+    w = game_state['board']['width']
+    h = game_state['board']['height']
+    return {'width': w, 'height': h, 'wall_penalty': _build_wall_penalty(w, h)}
 
 class MovementStrategy:
-    def __init__(self, game_state: Dict):
+    # A fixed attribute layout: no per-instance __dict__ and faster attribute loads
+    __slots__ = (
+        'game_state', 'board_width', 'board_height', 'my_snake', 'my_head', 'my_length', 'health',
+        'opponents', '_snakes', '_body_cells', '_obstacles', '_opp_heads', '_food', '_head_risk',
+        '_wall_penalty'
+    )
+
+    def __init__(self, game_state: Dict, game_cache: Optional[Dict] = None):
         self.game_state = game_state
         self.board_width = game_state['board']['width']
         self.board_height = game_state['board']['height']
         self.my_snake = game_state['you']
-        self.my_head = Position(game_state['you']['body'][0]['x'], game_state['you']['body'][0]['y'])
+        self.my_head = (game_state['you']['body'][0]['x'], game_state['you']['body'][0]['y'])
         self.my_length = len(game_state['you']['body'])
         self.health = game_state['you']['health']
-        self.opponents = [snake for snake in game_state['board']['snakes'] if snake['id'] != game_state['you']['id']]
+        self._snakes = game_state['board']['snakes']
+        self.opponents = [snake for snake in self._snakes if snake['id'] != self.my_snake['id']]
+
+        # Per-move lookups so the scoring passes don't re-walk the raw game state
+        self._body_cells = set()
+        for snake in self._snakes:
+            for segment in snake['body'][:-1]:  # Exclude tail
+                self._body_cells.add((segment['x'], segment['y']))
+        self._obstacles = self._build_obstacle_grid()
+        self._opp_heads = [(opponent['body'][0]['x'], opponent['body'][0]['y'], len(opponent['body'])) for opponent in self.opponents]
+        self._food = [(food['x'], food['y']) for food in game_state['board']['food']]
+        self._head_risk = self._build_head_risk()
+
+        # Shared across turns of the same game, so never mutate it here
+        if game_cache is None:
+            game_cache = _build_game_cache(game_state)
+        self._wall_penalty = game_cache['wall_penalty']
+
+    def score(self) -> List[float]:
+        """Score every possible move, indexed in _DIRS order."""
+        return self.evaluate_food_moves(self.get_safe_moves())
 
-    def get_safe_moves(self) -> Dict[Direction, float]:
-        """Calculate base safety scores for each possible move."""
-        moves = {
-            Direction.UP: 0,
-            Direction.DOWN: 0,
-            Direction.LEFT: 0,
-            Direction.RIGHT: 0
-        }
+    def get_safe_moves(self) -> List[float]:
+        """Calculate base safety scores for each possible move, indexed in _DIRS order."""
+        moves = []
 
         # Check basic collision avoidance
-        for direction in moves:
+        for direction in _DIRS:
             next_pos = self._get_next_position(direction)
             if self._is_valid_position(next_pos):
-                moves[direction] = self._calculate_position_safety(next_pos)
+                moves.append(self._calculate_position_safety(next_pos))
             else:
-                moves[direction] = float('-inf')
+                moves.append(float('-inf'))
 
         return moves
 
-    def _get_next_position(self, direction: Direction) -> Position:
+    def _get_next_position(self, direction: Direction) -> Tuple[int, int]:
         """Get the next position for a given direction."""
-        if direction == Direction.UP:
-            return Position(self.my_head.x, self.my_head.y + 1)
-        elif direction == Direction.DOWN:
-            return Position(self.my_head.x, self.my_head.y - 1)
-        elif direction == Direction.LEFT:
-            return Position(self.my_head.x - 1, self.my_head.y)
-        else:  # RIGHT
-            return Position(self.my_head.x + 1, self.my_head.y)
-
-    def _is_valid_position(self, pos: Position) -> bool:
-        """Check if a position is within board boundaries."""
-        return 0 <= pos.x < self.board_width and 0 <= pos.y < self.board_height
-
-    def _calculate_position_safety(self, pos: Position) -> float:
-        """Calculate safety score for a position."""
-        safety_score = 100.0
+        head_x, head_y = self.my_head
+        dx, dy = _NEXT[direction]
+        return (head_x + dx, head_y + dy)
 
-        # Check for immediate collisions with snake bodies
-        for snake in self.game_state['board']['snakes']:
-            for segment in snake['body'][:-1]:  # Exclude tail
-                if pos.x == segment['x'] and pos.y == segment['y']:
-                    return float('-inf')
-
-        # Check for potential head-to-head collisions
-        for opponent in self.opponents:
-            opponent_head = Position(opponent['body'][0]['x'], opponent['body'][0]['y'])
-            opponent_length = len(opponent['body'])
-            
-            if self._is_adjacent(pos, opponent_head):
-                # If we're smaller or equal size, avoid head-to-head
-                if self.my_length <= opponent_length:
-                    safety_score -= 75
-                # If we're larger, slightly prefer head-to-head
-                else:
-                    safety_score += 25
-
-        # Additional safety calculations for tight spaces using flood fill
-        space_score = self._calculate_flood_fill(pos)
-        if space_score < self.my_length:
-            safety_score -= (self.my_length - space_score) * 10
-
-        # Penalize moves close to walls
-        if pos.x == 0 or pos.x == self.board_width - 1:
-            safety_score -= 20
-        if pos.y == 0 or pos.y == self.board_height - 1:
-            safety_score -= 20
+    def _is_valid_position(self, pos: Tuple[int, int]) -> bool:
+        """Check if a position is within board boundaries."""
+        x, y = pos
+        return 0 <= x < self.board_width and 0 <= y < self.board_height
 
-        return safety_score
+    def _build_obstacle_grid(self) -> bytearray:
+        """Build a flat obstacle grid indexed by x * board_height + y."""
+        h = self.board_height
+        grid = bytearray(self.board_width * h)
 
-    def _calculate_flood_fill(self, start_pos: Position) -> int:
-        """Calculate available space using flood fill algorithm."""
-        board = [[0] * self.board_height for _ in range(self.board_width)]
-        
         # Mark all snake bodies on the board
-        for snake in self.game_state['board']['snakes']:
-            # Don't consider the tail as an obstacle if we're not going to grow
-            segments_to_mark = snake['body'][:-1] if snake['id'] == self.my_snake['id'] and self.health < 100 else snake['body']
-            for segment in segments_to_mark:
-                board[segment['x']][segment['y']] = 1
-
-        def flood_fill_recursive(x: int, y: int, visited: set) -> int:
-            # Check boundaries and obstacles
-            if (x, y) in visited or \
-               x < 0 or x >= self.board_width or \
-               y < 0 or y >= self.board_height or \
-               board[x][y] == 1:
-                return 0
-            
-            visited.add((x, y))
-            
-            # Recursively explore all directions
-            space = 1
-            for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                space += flood_fill_recursive(x + dx, y + dy, visited)
-            
-            return space
+        for x, y in self._body_cells:
+            grid[x * h + y] = 1
 
-        return flood_fill_recursive(start_pos.x, start_pos.y, set())
-
-    def _calculate_position_safety(self, pos: Position) -> float:
+        # Tails are obstacles too, except our own if we're not going to grow
+        for snake in self._snakes:
+            if snake['id'] == self.my_snake['id'] and self.health < 100:
+                continue
+            tail = snake['body'][-1]
+            grid[tail['x'] * h + tail['y']] = 1
+
+        return grid
+
+    def _calculate_flood_fill(self, start_pos: Tuple[int, int], limit: int) -> int:
+        """Calculate available space using an iterative flood fill, counting at most limit cells."""
+        w = self.board_width
+        h = self.board_height
+        grid = self._obstacles
+
+        # Fill a copy so the shared obstacle grid stays untouched
+        return _flood_fill(bytearray(grid), w, h, start_pos[0] * h + start_pos[1], limit)
+
+    def _build_head_risk(self) -> Dict[Tuple[int, int], int]:
+        """Map each cell next to an opponent head to its head-to-head score adjustment."""
+        head_risk: Dict[Tuple[int, int], int] = {}
+        for head_x, head_y, opponent_length in self._opp_heads:
+            # If we're smaller or equal size, strongly avoid head-to-head
+            # If we're larger, slightly prefer head-to-head
+            adjustment = -150 if self.my_length <= opponent_length else 25
+            for dx, dy in _NEIGHBORS:
+                cell = (head_x + dx, head_y + dy)
+                head_risk[cell] = head_risk.get(cell, 0) + adjustment
+        return head_risk
+
+    def _calculate_position_safety(self, pos: Tuple[int, int]) -> float:
         """Calculate safety score for a position."""
+        my_length = self.my_length
+        body_cells = self._body_cells
+        head_risk = self._head_risk
+        wall_penalty = self._wall_penalty
         safety_score = 100.0
 
-        # Check for immediate collisions with snake bodies
-        for snake in self.game_state['board']['snakes']:
-            for segment in snake['body'][:-1]:  # Exclude tail
-                if pos.x == segment['x'] and pos.y == segment['y']:
-                    return float('-inf')
+        # Check for immediate collisions with snake bodies (tails excluded)
+        if pos in body_cells:
+            return float('-inf')
 
         # Calculate available space using flood fill
-        available_space = self._calculate_flood_fill(pos)
+        # The open-space bonus saturates at 100 cells, so there is no need to count further
+        available_space = self._calculate_flood_fill(pos, max(my_length + 1, 100))
         
         # Strongly penalize moves that lead to spaces smaller than our length
-        if available_space <= self.my_length:
-            safety_score -= max(0, (self.my_length - available_space) * 30)
+        if available_space <= my_length:
+            safety_score -= (my_length - available_space) * 30
         
         # Give bonus for moves that lead to larger spaces
         else:
             safety_score += min(50, available_space / 2)
 
         # Check for potential head-to-head collisions
-        for opponent in self.opponents:
-            opponent_head = Position(opponent['body'][0]['x'], opponent['body'][0]['y'])
-            opponent_length = len(opponent['body'])
-            
-            if self._is_adjacent(pos, opponent_head):
-                # If we're smaller or equal size, strongly avoid head-to-head
-                if self.my_length <= opponent_length:
-                    safety_score -= 150
-                # If we're larger, slightly prefer head-to-head
-                else:
-                    safety_score += 25
+        if pos in head_risk:
+            safety_score += head_risk[pos]
 
         # Penalize moves close to walls, but less severely than before
-        if pos.x == 0 or pos.x == self.board_width - 1:
-            safety_score -= 10
-        if pos.y == 0 or pos.y == self.board_height - 1:
-            safety_score -= 10
+        if pos in wall_penalty:
+            safety_score -= wall_penalty[pos]
 
         return safety_score
 
-    def _is_adjacent(self, pos1: Position, pos2: Position) -> bool:
-        """Check if two positions are adjacent."""
-        return abs(pos1.x - pos2.x) + abs(pos1.y - pos2.y) == 1
-
-    def evaluate_food_moves(self, base_moves: Dict[Direction, float]) -> Dict[Direction, float]:
+    def evaluate_food_moves(self, base_moves: List[float]) -> List[float]:
         """Adjust move scores based on food positions."""
         if self.health < 50:  # More aggressive food seeking when health is low
             food_weight = 2.0
@@ -227,53 +273,81 @@ class MovementStrategy:
         else:
             food_weight = 0.5
 
-        for direction, score in base_moves.items():
-            if score == float('-inf'):
+        if not self._food:
+            return base_moves
+
+        # Several directions usually share a closest food, so only check each pellet once
+        am_closest: Dict[Tuple[int, int], bool] = {}
+        for i, direction in enumerate(_DIRS):
+            if base_moves[i] == float('-inf'):
                 continue
 
             next_pos = self._get_next_position(direction)
-            closest_food = self._find_closest_food(next_pos)
+            closest_food, food_distance = self._find_closest_food(next_pos)
             
             if closest_food:
                 # Check if we're the closest snake to this food
-                if self._am_closest_to_food(closest_food):
-                    food_score = self._calculate_food_score(next_pos, closest_food)
-                    base_moves[direction] += food_score * food_weight
+                if closest_food not in am_closest:
+                    am_closest[closest_food] = self._am_closest_to_food(closest_food)
+                if am_closest[closest_food]:
+                    food_score = self._calculate_food_score(food_distance)
+                    base_moves[i] += food_score * food_weight
 
         return base_moves
 
-    def _find_closest_food(self, pos: Position) -> Optional[Position]:
-        """Find the closest food pellet to a position."""
+    def _find_closest_food(self, pos: Tuple[int, int]) -> Tuple[Optional[Tuple[int, int]], float]:
+        """Find the closest food pellet to a position and its distance."""
+        x, y = pos
         min_distance = float('inf')
         closest_food = None
+        food = self._food
         
-        for food in self.game_state['board']['food']:
-            distance = abs(pos.x - food['x']) + abs(pos.y - food['y'])
+        for food_x, food_y in food:
+            distance = abs(x - food_x) + abs(y - food_y)
             if distance < min_distance:
                 min_distance = distance
-                closest_food = Position(food['x'], food['y'])
+                closest_food = (food_x, food_y)
+                if distance == 0:
+                    break
                 
-        return closest_food
+        return closest_food, min_distance
 
-    def _am_closest_to_food(self, food: Position) -> bool:
+    def _am_closest_to_food(self, food: Tuple[int, int]) -> bool:
         """Check if we're the closest snake to a food pellet."""
-        my_distance = abs(self.my_head.x - food.x) + abs(self.my_head.y - food.y)
+        food_x, food_y = food
+        my_x, my_y = self.my_head
+        my_distance = abs(my_x - food_x) + abs(my_y - food_y)
         
-        for opponent in self.opponents:
-            opponent_head = opponent['body'][0]
-            opponent_distance = abs(opponent_head['x'] - food.x) + abs(opponent_head['y'] - food.y)
+        for head_x, head_y, _ in self._opp_heads:
+            opponent_distance = abs(head_x - food_x) + abs(head_y - food_y)
             if opponent_distance < my_distance:
                 return False
         return True
 
-    def _calculate_food_score(self, pos: Position, food: Position) -> float:
+    def _calculate_food_score(self, distance: int) -> float:
         """Calculate score modification based on distance to food."""
-        distance = abs(pos.x - food.x) + abs(pos.y - food.y)
         return max(50 - distance * 5, 0)  # Decreasing score with distance
 
 # Game state functions
+
+# Per-game constants keyed by game id, filled on start (or the first move
+# this process sees) and dropped on end
+_GAME_CACHE: Dict[str, Dict] = {}
+# Games that never send /end would otherwise accumulate forever
+_GAME_CACHE_MAX = 256
+
+def _get_game_cache(game_state: typing.Dict) -> typing.Dict:
+    game_id = game_state['game']['id']
+    board = game_state['board']
+    game_cache = _GAME_CACHE.get(game_id)
+    if game_cache is None or game_cache['width'] != board['width'] or game_cache['height'] != board['height']:
+        if len(_GAME_CACHE) >= _GAME_CACHE_MAX:
+            _GAME_CACHE.clear()
+        game_cache = _GAME_CACHE[game_id] = _build_game_cache(game_state)
+    return game_cache
+
 def info() -> typing.Dict:
-    print("INFO")
+    logger.debug("INFO")
     return {
         "apiversion": "1",
         "author": "Finlay",  # TODO: Your name here
@@ -283,35 +357,36 @@ def info() -> typing.Dict:
     }
 
 def start(game_state: typing.Dict):
-    print(f"GAME START -> {game_state['game']['id']}")
+    logger.debug("GAME START -> %s", game_state['game']['id'])
+    _get_game_cache(game_state)
 
 def end(game_state: typing.Dict):
-    print(f"GAME OVER -> {game_state['game']['id']}")
+    logger.debug("GAME OVER -> %s", game_state['game']['id'])
+    _GAME_CACHE.pop(game_state['game']['id'], None)
 
 def move(game_state: typing.Dict) -> typing.Dict:
     """Main move function."""
-    strategy = MovementStrategy(game_state)
-    
-    # Get base safe moves
-    moves = strategy.get_safe_moves()
+    strategy = MovementStrategy(game_state, _get_game_cache(game_state))
     
-    # Adjust for food
-    moves = strategy.evaluate_food_moves(moves)
+    # Get safe moves adjusted for food
+    scores = strategy.score()
     
-    # Choose the best move
-    best_move = max(moves.items(), key=lambda x: x[1])
+    # Choose the best move (first one wins ties)
+    best = scores.index(max(scores))
     
     # Debug logging
-    print(f"Moves evaluation: {moves}")
-    print(f"Chosen move: {best_move[0].value} with score {best_move[1]}")
+    if DEBUG:
+        logger.debug("Moves evaluation: %s", dict(zip(_DIRS, scores)))
+        logger.debug("Chosen move: %s with score %s", _DIRS[best].value, scores[best])
     
-    return {"move": best_move[0].value}
+    return {"move": _DIRS[best].value}
 
 if __name__ == "__main__":
     host = "0.0.0.0"
     port = int(os.environ.get("PORT", "8000"))
     
-    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    # Multi-threaded production server so concurrent games don't queue behind each other
+    from waitress import serve
     
     print(f"\nRunning Battlesnake at http://{host}:{port}")
-    app.run(host=host, port=port)
+    serve(app, host=host, port=port, threads=8)